@@ -488,9 +488,9 @@ class JOB_SUBMIT:
 
                 if len(rerun_job_files) > 0:
                    for job_file_name in rerun_job_files:
-                       wall_time = putils.extract_walltime_from_job_file(job_file_name)
-                       current_queue = putils.extract_queuename_from_job_file(job_file_name)
-                       new_wall_time, new_queue = putils.compute_rerun_walltime_and_queue(job_file_name)
+                       job_metadata = putils.extract_job_metadata(job_file_name)
+                       wall_time, current_queue = job_metadata
+                       new_wall_time, new_queue = putils.compute_rerun_walltime_and_queue(job_file_name, job_metadata)
                        putils.replace_walltime_in_job_file(job_file_name, new_wall_time)
                        if new_queue is not None:
                            putils.replace_queuename_in_job_file(job_file_name, new_queue)
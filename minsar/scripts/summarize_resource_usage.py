@@ -18,13 +18,14 @@ Efficiency (OK/LOW_CPU/HIGH_MAJOR_FAULTS/CHECK), LAUNCHER_PPN, LAUNCHER_NHOSTS,
 
 import re
 import os
-import glob
 import sys
-import h5py
 import argparse
-from osgeo import gdal
+import functools
+import itertools
+import concurrent.futures
+import numpy as np
 from collections import defaultdict
-from statistics import mean, median
+from statistics import mean
 from datetime import timedelta
 from minsar.objects.dataset_template import Template
 from minsar.utils import process_utilities as putils
@@ -32,6 +33,19 @@ from minsar.objects import message_rsmas
 from argparse import Namespace
 
 NOMINAL_BURST_SIZE_SAMPLES = 23811 * 1505
+_PARSE_MAX_WORKERS = 16  # parallel time_log parsing (I/O-latency bound on NFS/Lustre)
+
+_MEM_RE = re.compile(r"Maximum resident set size\s*\(kbytes\):\s*(\d+)")
+_WALL_RE = re.compile(r"Elapsed \(wall clock\) time.*: ([0-9:.]+)")
+_BURSTS_RE = re.compile(r'number of bursts: (\d+)')
+
+# Optional GNU time -v fields: key -> (cheap substring marker, compiled pattern)
+_OPTIONAL_TIME_LOG_FIELDS = {
+    "user_sec": ("User time", re.compile(r"User time \(seconds\):\s*([\d.]+)")),
+    "system_sec": ("System time", re.compile(r"System time \(seconds\):\s*([\d.]+)")),
+    "cpu_pct": ("Percent of CPU", re.compile(r"Percent of CPU this job got:\s*(\d+)")),
+    "major_faults": ("Major (requiring I/O)", re.compile(r"Major \(requiring I/O\) page faults:\s*(\d+)")),
+}
 
 ##########################################################
 def create_parser():
@@ -55,7 +69,7 @@ Examples:
 
     log_files = []
     for pattern in inps.log_dirs:
-        matched = glob.glob(os.path.join(pattern, "*.time_log"))
+        matched = _list_files_with_suffix(pattern, ".time_log")
         if not matched:
             print(f"Warning: No files matched pattern: {pattern}/*.time_log", file=sys.stderr)
         log_files.extend(matched)
@@ -67,10 +81,13 @@ Examples:
 
     return inps
 
-def _parse_optional_float(content, pattern, default=None):
-    m = re.search(pattern, content)
-    return float(m.group(1)) if m else default
-
+def _list_files_with_suffix(directory, suffix):
+    """Return paths of regular files in directory ending with suffix ([] if directory is missing)."""
+    try:
+        with os.scandir(directory) as it:
+            return [entry.path for entry in it if entry.name.endswith(suffix) and entry.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
 
 ##########################################################
 def parse_time_log_file(filepath):
@@ -78,12 +95,26 @@ def parse_time_log_file(filepath):
     Extract from a .time_log file (GNU time -v style): memory (MB), wall time (s),
     user/system time (s), CPU%, major page faults. Returns a dict or None if essential
     fields are missing. Keys: mem_mb, wall_sec, user_sec, system_sec, cpu_pct, cpu_ratio, major_faults.
+    The file is streamed line by line and reading stops once all fields have been found.
     """
+    mem_match = wall_match = None
+    optional = {}
     with open(filepath) as f:
-        content = f.read()
+        for line in f:
+            if mem_match is None and "Maximum resident set size" in line:
+                mem_match = _MEM_RE.search(line)
+            elif wall_match is None and "Elapsed (wall clock)" in line:
+                wall_match = _WALL_RE.search(line)
+            else:
+                for key, (marker, pattern) in _OPTIONAL_TIME_LOG_FIELDS.items():
+                    if key not in optional and marker in line:
+                        m = pattern.search(line)
+                        if m:
+                            optional[key] = float(m.group(1))
+                        break
+            if mem_match and wall_match and len(optional) == len(_OPTIONAL_TIME_LOG_FIELDS):
+                break
 
-    mem_match = re.search(r"Maximum resident set size\s*\(kbytes\):\s*(\d+)", content)
-    wall_match = re.search(r"Elapsed \(wall clock\) time.*: ([0-9:.]+)", content)
     if not mem_match or not wall_match:
         print(f"Warning: failed to parse {filepath}", file=sys.stderr)
         return None
@@ -104,10 +135,10 @@ def parse_time_log_file(filepath):
         print(f"Warning: invalid wall time format in {filepath}", file=sys.stderr)
         return None
 
-    user_sec = _parse_optional_float(content, r"User time \(seconds\):\s*([\d.]+)")
-    system_sec = _parse_optional_float(content, r"System time \(seconds\):\s*([\d.]+)")
-    cpu_pct = _parse_optional_float(content, r"Percent of CPU this job got:\s*(\d+)")
-    major_faults = _parse_optional_float(content, r"Major \(requiring I/O\) page faults:\s*(\d+)")
+    user_sec = optional.get("user_sec")
+    system_sec = optional.get("system_sec")
+    cpu_pct = optional.get("cpu_pct")
+    major_faults = optional.get("major_faults")
     if major_faults is not None:
         major_faults = int(major_faults)
 
@@ -128,7 +159,13 @@ def parse_time_log_file(filepath):
 
 ##########################################################
 def extract_runfile_name(filename):
-    base = os.path.basename(filename).replace('.time_log', '')
+    return _runfile_name_from_basename(os.path.basename(filename))
+
+
+@functools.lru_cache(maxsize=4096)
+def _runfile_name_from_basename(basename):
+    # cached on the basename so the same step name in different run_files dirs hits the cache
+    base = basename.replace('.time_log', '')
     parts = base.split('_')
 
     group_parts = parts[:2]  # 'run' and step number
@@ -192,14 +229,16 @@ def get_launcher_params_from_job_file(job_file_path):
 
 ##########################################################
 def get_slc_data_size_from_data(dir, number_of_bursts):
-    
-    burst_files = glob.glob(f"{dir}/*.tiff")
+    from osgeo import gdal
+
+    burst_files = _list_files_with_suffix(dir, ".tiff")
     if not burst_files:
         raise FileNotFoundError(f"User error: no burst files (*.tiff) found in directory: {dir}")
-    dataset = gdal.Open(burst_files[0])
-
+    # Only the raster size is needed: open read-only as raster (GTiff parses just the header) and release it
+    dataset = gdal.OpenEx(burst_files[0], gdal.OF_RASTER | gdal.OF_READONLY)
     width = dataset.RasterXSize
     length = dataset.RasterYSize
+    dataset = None
     
     number_of_samples = length * width
     burst_size_units = number_of_samples / NOMINAL_BURST_SIZE_SAMPLES
@@ -209,6 +248,8 @@ def get_slc_data_size_from_data(dir, number_of_bursts):
 ##########################################################
 def get_miaplpy_data_size_from_data(dir):
     """Calculate the total SLC size in burst-size units based on the SLC data."""
+    import h5py
+
     slc_file = f"{dir}/slcStack.h5" 
     with h5py.File(slc_file, 'r') as f:
         shape = f['/slc'].shape  # Format: (time, length, width)
@@ -231,7 +272,7 @@ def get_number_of_bursts_from_out_create_jobfiles(file_path='out_create_jobfiles
     with open(file_path, 'r') as f:
         for line in f:
             if "number of bursts" in line:
-                match = re.search(r'number of bursts: (\d+)', line)
+                match = _BURSTS_RE.search(line)
                 if match:
                     number_of_bursts = int(match.group(1))
                     break
@@ -285,16 +326,6 @@ def main(iargs=None):
     summary_lines.append(f"Queue: {os.getenv('QUEUENAME')}")
     summary_lines.append(f"JOB_SUBMISSION_SCHEME: {job_submission_scheme}")
 
-    data = defaultdict(list)
-    group_dirs = {}
-    for file in isce_log_files + miaplpy_log_files:
-        row = parse_time_log_file(file)
-        if row is not None:
-            group = extract_runfile_name(file)
-            data[group].append(row)
-            if group not in group_dirs:
-                group_dirs[group] = os.path.dirname(file)
-
     def efficiency_label(mean_cpu_pct, max_major_faults):
         if mean_cpu_pct is not None and max_major_faults is not None:
             if mean_cpu_pct >= 85 and max_major_faults <= 10:
@@ -313,46 +344,68 @@ def main(iargs=None):
             return (2, name)
         return (0, name)
 
+    all_log_files = isce_log_files + miaplpy_log_files
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_PARSE_MAX_WORKERS) as executor:
+        rows = list(executor.map(parse_time_log_file, all_log_files))
+    # (group, file, row) sorted into report order; the stable sort keeps file order within a group
+    parsed = sorted(
+        ((extract_runfile_name(file), file, row) for file, row in zip(all_log_files, rows) if row is not None),
+        key=lambda item: group_sort_key(item[0]),
+    )
+
     if not os.path.isdir(inps.outdir):
         os.makedirs(inps.outdir, exist_ok=True)
 
+    step_lines = []
+    for group, items in itertools.groupby(parsed, key=lambda item: item[0]):
+        # One list per field (column layout); optional fields only keep values that were found
+        columns = defaultdict(list)
+        group_dir = None
+        for _, file, row in items:
+            if group_dir is None:
+                group_dir = os.path.dirname(file)
+            for key, value in row.items():
+                if value is not None:
+                    columns[key].append(value)
+        mem_vals = np.asarray(columns["mem_mb"], dtype=np.float64)
+        wall_vals = np.asarray(columns["wall_sec"], dtype=np.float64)
+        max_mem = mem_vals.max()
+        med_mem = np.median(mem_vals)
+        mean_mem = mem_vals.mean()
+        max_wall = format_seconds(wall_vals.max())
+        mean_wall = format_seconds(wall_vals.mean())
+        line = (
+            f"{group}: MaxMem={max_mem:.2f} MB  MedMem={med_mem:.2f} MB  "
+            f"MeanMem={mean_mem:.2f} MB  MaxWall={max_wall}  MeanWall={mean_wall}"
+        )
+        cpu_pcts = columns["cpu_pct"]
+        cpu_ratios = columns["cpu_ratio"]
+        major_faults_list = columns["major_faults"]
+        mean_cpu_pct = mean(cpu_pcts) if cpu_pcts else None
+        min_cpu_pct = min(cpu_pcts) if cpu_pcts else None
+        mean_cpu_ratio = mean(cpu_ratios) if cpu_ratios else None
+        max_major_faults = max(major_faults_list) if major_faults_list else None
+        eff = efficiency_label(mean_cpu_pct, max_major_faults)
+        line += f"  MeanCPU%={mean_cpu_pct:.0f}" if mean_cpu_pct is not None else "  MeanCPU%=n/a"
+        line += f"  MinCPU%={min_cpu_pct:.0f}" if min_cpu_pct is not None else "  MinCPU%=n/a"
+        line += f"  CPU_ratio={mean_cpu_ratio:.2f}" if mean_cpu_ratio is not None else "  CPU_ratio=n/a"
+        line += f"  MaxMajorFaults={max_major_faults}" if max_major_faults is not None else "  MaxMajorFaults=n/a"
+        line += f"  Efficiency={eff}"
+        job_file = os.path.join(group_dir, f"{group}_0.job")
+        launcher_params = get_launcher_params_from_job_file(job_file)
+        if launcher_params:
+            # Fixed order: LAUNCHER_PPN, LAUNCHER_NHOSTS, launcher_file_lines, OMP_NUM_THREADS
+            order = ("LAUNCHER_PPN", "LAUNCHER_NHOSTS", "launcher_file_lines", "OMP_NUM_THREADS")
+            launcher_str = "  ".join(f"{k}={launcher_params[k]}" for k in order if k in launcher_params)
+            line = f"{line}  {launcher_str}"
+        step_lines.append(line)
+
+    # One write for the summary file and one for stdout instead of two per step
+    step_text = "".join(f"{line}\n" for line in step_lines)
     with open(f"{inps.outdir}/walltimes_memory.log", "w") as f:
-        f.write("\n".join(summary_lines) + "\n")
-        for group in sorted(data, key=group_sort_key):
-            rows = data[group]
-            mem_vals = [r["mem_mb"] for r in rows]
-            wall_vals = [r["wall_sec"] for r in rows]
-            max_mem = max(mem_vals)
-            med_mem = median(mem_vals)
-            mean_mem = mean(mem_vals)
-            max_wall = format_seconds(max(wall_vals))
-            mean_wall = format_seconds(mean(wall_vals))
-            line = (
-                f"{group}: MaxMem={max_mem:.2f} MB  MedMem={med_mem:.2f} MB  "
-                f"MeanMem={mean_mem:.2f} MB  MaxWall={max_wall}  MeanWall={mean_wall}"
-            )
-            cpu_pcts = [r["cpu_pct"] for r in rows if r.get("cpu_pct") is not None]
-            cpu_ratios = [r["cpu_ratio"] for r in rows if r.get("cpu_ratio") is not None]
-            major_faults_list = [r["major_faults"] for r in rows if r.get("major_faults") is not None]
-            mean_cpu_pct = mean(cpu_pcts) if cpu_pcts else None
-            min_cpu_pct = min(cpu_pcts) if cpu_pcts else None
-            mean_cpu_ratio = mean(cpu_ratios) if cpu_ratios else None
-            max_major_faults = max(major_faults_list) if major_faults_list else None
-            eff = efficiency_label(mean_cpu_pct, max_major_faults)
-            line += f"  MeanCPU%={mean_cpu_pct:.0f}" if mean_cpu_pct is not None else "  MeanCPU%=n/a"
-            line += f"  MinCPU%={min_cpu_pct:.0f}" if min_cpu_pct is not None else "  MinCPU%=n/a"
-            line += f"  CPU_ratio={mean_cpu_ratio:.2f}" if mean_cpu_ratio is not None else "  CPU_ratio=n/a"
-            line += f"  MaxMajorFaults={max_major_faults}" if max_major_faults is not None else "  MaxMajorFaults=n/a"
-            line += f"  Efficiency={eff}"
-            job_file = os.path.join(group_dirs.get(group, ''), f"{group}_0.job")
-            launcher_params = get_launcher_params_from_job_file(job_file)
-            if launcher_params:
-                # Fixed order: LAUNCHER_PPN, LAUNCHER_NHOSTS, launcher_file_lines, OMP_NUM_THREADS
-                order = ("LAUNCHER_PPN", "LAUNCHER_NHOSTS", "launcher_file_lines", "OMP_NUM_THREADS")
-                launcher_str = "  ".join(f"{k}={launcher_params[k]}" for k in order if k in launcher_params)
-                line = f"{line}  {launcher_str}"
-            print(line)
-            f.write(line + "\n")
+        f.write("\n".join(summary_lines) + "\n" + step_text)
+    sys.stdout.write(step_text)
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
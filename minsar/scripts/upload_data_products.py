@@ -9,7 +9,9 @@ import subprocess
 import sys
 import glob
 import shutil
-import shlex
+import stat
+import atexit
+import concurrent.futures
 from datetime import datetime
 import argparse
 from pathlib import Path
@@ -50,6 +52,8 @@ def create_parser():
     parser.add_argument('--triplets', dest='triplets_flag', action='store_true', default=True, help='uploads numTriNonzeroIntAmbiguity.h5')
     parser.add_argument('--quiet-summary', dest='quiet_summary', action='store_true', default=False,
                         help='suppress final Data at: URL summary (logs are still written)')
+    parser.add_argument('--parallel', dest='num_streams', type=int, default=1, metavar='N',
+                        help='number of concurrent rsync streams (Default: 1, single stream with progress over the ssh master)')
 
     return parser
 
@@ -74,18 +78,35 @@ class Inps:
     def __init__(self, dir):
         self.dir = dir
 
+def cached_stat(path, stat_cache):
+    """os.stat(path) memoized in stat_cache (a dict owned by the caller); None if the path does not exist."""
+    if path not in stat_cache:
+        try:
+            stat_cache[path] = os.stat(path)
+        except OSError:
+            stat_cache[path] = None
+    return stat_cache[path]
+
+def cached_isdir(path, stat_cache):
+    st = cached_stat(path, stat_cache)
+    return st is not None and stat.S_ISDIR(st.st_mode)
+
 def create_html_if_needed(dir):
     if not os.path.isfile(dir + '/index.html'):
         # Create an instance of Inps with the directory
         inps = Inps(dir)
         create_html(inps)
 
-def add_log_remote_hdfeos5(scp_list, work_dir):
-    # add uploaded he5 files to remote log file
+REMOTE_ENV_VARS = ('REMOTEHOST_DATA', 'REMOTEUSER', 'REMOTELOGFILE')
+
+def add_log_remote_hdfeos5(scp_list, work_dir, env=None, ssh_options=()):
+    # add uploaded he5 files to remote log file (env: REMOTE_ENV_VARS values looked up once in main)
 
-    REMOTEHOST_DATA = os.getenv('REMOTEHOST_DATA')
-    REMOTEUSER = os.getenv('REMOTEUSER')
-    REMOTELOGFILE = os.getenv('REMOTELOGFILE')
+    if env is None:
+        env = {key: os.getenv(key) for key in REMOTE_ENV_VARS}
+    REMOTEHOST_DATA = env['REMOTEHOST_DATA']
+    REMOTEUSER = env['REMOTEUSER']
+    REMOTELOGFILE = env['REMOTELOGFILE']
 
     try:
         he5_pattern = [item for item in scp_list if item.endswith('.he5')][0]
@@ -110,15 +131,22 @@ def add_log_remote_hdfeos5(scp_list, work_dir):
         raise Exception('ERROR: data_footprint not found in metadata')
     data_footprint = metadata['data_footprint']
 
-    for relative_file in relative_he5_files:
-        # command = f"echo {current_date} {relative_file} | ssh {REMOTEUSER}@{REMOTEHOST_DATA} 'cat >> {REMOTELOGFILE}'"
-        escaped_data_footprint = shlex.quote(data_footprint)
-
-        command = f"""ssh {REMOTEUSER}@{REMOTEHOST_DATA} "echo {current_date} {relative_file} {escaped_data_footprint} >> {REMOTELOGFILE}" """
-
-        status = subprocess.Popen(command, shell=True).wait()
-        if status != 0:
-            raise Exception('ERROR appending to remote log file in upload_data_products.py')
+    # append all lines with one ssh session; lines go via stdin so the footprint needs no shell quoting
+    log_lines = ''.join(f"{current_date} {relative_file} {data_footprint}\n" for relative_file in relative_he5_files)
+    command = ['ssh', *ssh_options, f'{REMOTEUSER}@{REMOTEHOST_DATA}', f'cat >> {REMOTELOGFILE}']
+    print(' '.join(command))
+    status = subprocess.run(command, input=log_lines, text=True).returncode
+    if status != 0:
+        raise Exception('ERROR appending to remote log file in upload_data_products.py')
+
+def rsync_files_from(paths, src_dir, dest, progress=True, ssh_options=()):
+    """Upload paths (relative to src_dir) with one rsync session reading the list from stdin; returns exit status."""
+    command = ['rsync', '-avz', '-r'] + (['--progress'] if progress else [])
+    if ssh_options:
+        command += ['-e', ' '.join(['ssh', *ssh_options])]
+    command += ['--files-from=-', f'{src_dir}/', dest]
+    print(' '.join(command) + f'   ({len(paths)} paths on stdin)')
+    return subprocess.run(command, input='\n'.join(paths) + '\n', text=True).returncode
 
 ##############################################################################
 
@@ -126,6 +154,9 @@ def main(iargs=None):
 
     inps = cmd_line_parse()
 
+    # stat results for this run only (a later main() call in the same process starts fresh)
+    stat_cache = {}
+
     inps.work_dir = os.getcwd()
     inps.project_name = os.path.basename(inps.work_dir)
 
@@ -140,8 +171,9 @@ def main(iargs=None):
 
     message_rsmas.log(inps.work_dir, os.path.basename(__file__) + ' ' + ' '.join(input_arguments))
 
-    REMOTEHOST_DATA = os.getenv('REMOTEHOST_DATA')
-    REMOTEUSER = os.getenv('REMOTEUSER')
+    env = {key: os.getenv(key) for key in REMOTE_ENV_VARS}
+    REMOTEHOST_DATA = env['REMOTEHOST_DATA']
+    REMOTEUSER = env['REMOTEUSER']
     REMOTE_DIR = '/data/HDF5EOS/'
     REMOTE_CONNECTION = REMOTEUSER + '@' + REMOTEHOST_DATA
     REMOTE_CONNECTION_DIR = REMOTE_CONNECTION + ':' + REMOTE_DIR
@@ -153,13 +185,13 @@ def main(iargs=None):
         # If path is a subdirectory (contains '/'), determine if it should upload all contents
         # Upload all for: mintpy/inputs, test1/EnvD140, miaplpy_*/network_*/pic, etc.
         # Use standard processing for: miaplpy_*/network_single_reference (network dirs themselves)
-        if '/' in data_dir and os.path.isdir(data_dir):
+        if '/' in data_dir and cached_isdir(data_dir, stat_cache):
             basename = os.path.basename(data_dir)
             # If it's a network directory itself (ends with network_*), use standard processing
             # Otherwise, if it's a subdirectory (like pic, inputs, geo), upload all contents
             if not basename.startswith('network_'):
                 print(f"Uploading all contents of directory: {data_dir}")
-                if os.path.isdir(data_dir + '/pic'):
+                if cached_isdir(data_dir + '/pic', stat_cache):
                     create_html_if_needed(data_dir + '/pic')
                 scp_list.extend(['/' + data_dir])
                 continue
@@ -168,12 +200,12 @@ def main(iargs=None):
         if 'mintpy' in data_dir:
             # Handle --all flag: upload entire directory
             if inps.all_flag:
-                if os.path.isdir(data_dir + '/pic'):
+                if cached_isdir(data_dir + '/pic', stat_cache):
                     create_html_if_needed(data_dir + '/pic')
                 scp_list.extend(['/' + data_dir])
                 continue  # Skip specific file patterns
 
-            if os.path.isdir(data_dir + '/pic'):
+            if cached_isdir(data_dir + '/pic', stat_cache):
                create_html_if_needed(data_dir + '/pic')
 
             scp_list.extend([ '/'+ data_dir +'/pic', ])
@@ -208,7 +240,7 @@ def main(iargs=None):
                     dir_list = glob.glob(data_dir + '/network_*')
 
                 for network_dir in dir_list:
-                    if os.path.isdir(network_dir + '/pic'):
+                    if cached_isdir(network_dir + '/pic', stat_cache):
                         create_html_if_needed(network_dir + '/pic')
                     scp_list.extend(['/' + network_dir])
                 continue  # Skip specific file patterns
@@ -248,7 +280,7 @@ def main(iargs=None):
                        ])
 
                     timeseries_path = 'timeseries_demErr.h5'
-                    if  os.path.exists(network_dir + '/' + 'timeseries_ERA5_demErr.h5'):
+                    if  cached_stat(network_dir + '/' + 'timeseries_ERA5_demErr.h5', stat_cache) is not None:
                         timeseries_path = 'timeseries_ERA5_demErr.h5'
 
                     # FA 8/24: This section for edgar to have the high-res files
@@ -279,10 +311,13 @@ def main(iargs=None):
         else:
             # Other directories (e.g., EnvD140, sarvey, etc.) - upload entire directory
             print(f"Uploading all contents of directory: {data_dir}")
-            if os.path.isdir(data_dir + '/pic'):
+            if cached_isdir(data_dir + '/pic', stat_cache):
                 create_html_if_needed(data_dir + '/pic')
             scp_list.extend(['/' + data_dir])
 
+    # Remove duplicate patterns (e.g. numTriNonzeroIntAmbiguity.h5, geo_velocity.h5), preserving order
+    scp_list = list(dict.fromkeys(scp_list))
+
     print('################')
     print('Data to upload: ')
     for element in scp_list:
@@ -294,37 +329,33 @@ def main(iargs=None):
 
     # Write upload.log for all uploaded directories
     remote_urls = []
-    for data_dir in inps.data_dirs:
-        data_dir = data_dir.rstrip('/')
+    remote_base = f'http://{REMOTEHOST_DATA}{REMOTE_DIR}{project_name}/'
+    with open('upload.log', 'a') as upload_log:
+        for data_dir in inps.data_dirs:
+            data_dir = data_dir.rstrip('/')
 
-        # Check if this directory has a pic subdirectory
-        pic_dir = data_dir + '/pic'
-        if os.path.isdir(pic_dir):
-            # If pic exists, URL points to pic directory
-            remote_url = 'http://' + REMOTEHOST_DATA + REMOTE_DIR + project_name + '/' + data_dir + '/pic'
+            # If a pic subdirectory exists the URL points to it, otherwise to the uploaded directory itself
+            pic_dir = data_dir + '/pic'
+            has_pic = cached_isdir(pic_dir, stat_cache)
+            remote_url = remote_base + data_dir + ('/pic' if has_pic else '')
 
             # Append to main upload.log
-            with open('upload.log', 'a') as f:
-                f.write(remote_url + "\n")
+            upload_log.write(remote_url + "\n")
 
             # Write to pic/upload.log (only if pic directory exists)
-            with open(pic_dir + '/upload.log', 'w') as f:
-                f.write(remote_url + "\n")
-
-            remote_urls.append(remote_url)
-        else:
-            # If no pic directory, URL points to the uploaded directory itself
-            remote_url = 'http://' + REMOTEHOST_DATA + REMOTE_DIR + project_name + '/' + data_dir
-
-            # Append to main upload.log
-            with open('upload.log', 'a') as f:
-                f.write(remote_url + "\n")
+            if has_pic:
+                with open(pic_dir + '/upload.log', 'w') as f:
+                    f.write(remote_url + "\n")
 
             remote_urls.append(remote_url)
 
     # If miaplpy/inputs is uploaded and contains slcStack.h5, add missing ORBIT_DIRECTION / relative_orbit
     add_missing_attributes_for_upload(inps.work_dir, inps.data_dirs)
 
+    # All following ssh calls (and a single rsync stream) share one multiplexed connection
+    ssh_options = putils.start_ssh_master(REMOTE_CONNECTION)
+    atexit.register(putils.stop_ssh_master, REMOTE_CONNECTION, ssh_options)
+
     print('\n################')
     for data_dir in inps.data_dirs:
         data_dir = data_dir.rstrip('/')
@@ -332,25 +363,24 @@ def main(iargs=None):
         if 'mintpy' in data_dir or 'miaplpy' in data_dir:
             print('Deleting remote mintpy/miaplpy directories ...')
             remote_path = f'{REMOTE_DIR}{project_name}/{data_dir}'
-            cleanup_cmd = f'ssh {REMOTE_CONNECTION} "rm -rf {remote_path}"'
-            print(f'Deleting: {cleanup_cmd}')
-            status = subprocess.Popen(cleanup_cmd, shell=True).wait()
+            cleanup_cmd = ['ssh', *ssh_options, REMOTE_CONNECTION, 'rm', '-rf', remote_path]
+            print(f'Deleting: {" ".join(cleanup_cmd)}')
+            status = subprocess.run(cleanup_cmd).returncode
             if status != 0:
                 print(f'Warning: Could not delete {remote_path} (may not exist yet)')
 
     print('################\n')
 
-    # Step 1: Collect all unique directories that need to be created
+    # Step 1: Collect all unique directories that need to be created and all local paths to upload
     unique_dirs = set()
-    upload_commands = []
+    upload_paths = []
+    seen_paths = set()
 
     for pattern in scp_list:
-        if len(glob.glob(inps.work_dir + pattern)) >= 1:
-            files = glob.glob(inps.work_dir + pattern)
-
-            if os.path.isfile(files[0]):
-                full_dir_name = os.path.dirname(files[0])
-            elif os.path.isdir(files[0]):
+        files = glob.glob(inps.work_dir + pattern)
+        if files:
+            st = cached_stat(files[0], stat_cache)
+            if st is not None and (stat.S_ISREG(st.st_mode) or stat.S_ISDIR(st.st_mode)):
                 full_dir_name = os.path.dirname(files[0])
             else:
                 raise Exception('ERROR finding directory in pattern in upload_data_products.py')
@@ -358,26 +388,38 @@ def main(iargs=None):
             dir_name = full_dir_name.removeprefix(inps.work_dir + '/')
             unique_dirs.add(dir_name)
 
-            # Store upload command for later
-            upload_cmd = f'rsync -avz --progress {inps.work_dir}{pattern} {REMOTE_CONNECTION_DIR}/{project_name}/{"/".join(pattern.split("/")[0:-1])}'
-            upload_commands.append(upload_cmd)
+            # Store paths relative to work_dir for a single rsync --files-from session
+            for file in files:
+                rel_path = os.path.relpath(os.path.normpath(file), inps.work_dir)
+                if rel_path not in seen_paths:
+                    seen_paths.add(rel_path)
+                    upload_paths.append(rel_path)
 
     # Step 2: Create ALL remote directories with ONE SSH command
     if unique_dirs:
         print('\nCreating all remote directories with one SSH command...')
-        all_dirs = ' '.join([f'{REMOTE_DIR}{project_name}/{d}' for d in sorted(unique_dirs)])
-        command = f'ssh {REMOTE_CONNECTION} "mkdir -p {all_dirs}"'
-        print(command)
-        status = subprocess.Popen(command, shell=True).wait()
+        all_dirs = [f'{REMOTE_DIR}{project_name}/{d}' for d in sorted(unique_dirs)]
+        command = ['ssh', *ssh_options, REMOTE_CONNECTION, 'mkdir', '-p', *all_dirs]
+        print(' '.join(command))
+        status = subprocess.run(command).returncode
         if status != 0:
             raise Exception('ERROR creating remote directories in upload_data_products.py')
 
-    # Step 3: Upload all data
-    for command in upload_commands:
+    # Step 3: Upload all data with up to --parallel rsync sessions (--files-from implies --relative;
+    # -r recurses into listed dirs). Each stream creates the implied parent directories of its own
+    # paths on the remote side, so streams do not depend on the mkdir step or on each other.
+    if upload_paths:
         print('\nUploading data:')
-        print(command)
-        status = subprocess.Popen(command, shell=True).wait()
-        if status != 0:
+        num_streams = max(1, min(inps.num_streams, len(upload_paths)))
+        chunks = [upload_paths[i::num_streams] for i in range(num_streams)]
+        dest = f'{REMOTE_CONNECTION_DIR}{project_name}/'
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_streams) as executor:
+            # parallel streams keep their own TCP connections; a single stream reuses the master
+            stream_ssh_options = ssh_options if num_streams == 1 else ()
+            futures = [executor.submit(rsync_files_from, chunk, inps.work_dir, dest, num_streams == 1, stream_ssh_options)
+                       for chunk in chunks]
+            statuses = [future.result() for future in concurrent.futures.as_completed(futures)]
+        if any(status != 0 for status in statuses):
             raise Exception('ERROR uploading using rsync in upload_data_products.py')
 
     # Step 4: Adjust permissions for all uploaded directories
@@ -393,15 +435,15 @@ def main(iargs=None):
 
     # Adjust permissions for all top-level directories at once
     if unique_top_dirs:
-        all_paths = ' '.join([f'{REMOTE_DIR}{project_name}/{d}' for d in sorted(unique_top_dirs)])
-        command = f'ssh {REMOTEUSER}@{REMOTEHOST_DATA} "chmod -R u=rwX,go=rX {all_paths}"'
-        print(command)
-        status = subprocess.Popen(command, shell=True).wait()
+        all_paths = [f'{REMOTE_DIR}{project_name}/{d}' for d in sorted(unique_top_dirs)]
+        command = ['ssh', *ssh_options, REMOTE_CONNECTION, 'chmod', '-R', 'u=rwX,go=rX', *all_paths]
+        print(' '.join(command))
+        status = subprocess.run(command).returncode
         if status != 0:
             raise Exception('ERROR adjusting permissions in upload_data_products.py')
 
 ##########################################
-    add_log_remote_hdfeos5(scp_list, inps.work_dir)
+    add_log_remote_hdfeos5(scp_list, inps.work_dir, env, ssh_options)
 ##########################################
     if not inps.quiet_summary:
         print('\nData at:')
@@ -8,7 +8,7 @@ import subprocess
 import sys
 import glob
 import shutil
-import shlex
+import atexit
 from datetime import datetime
 import argparse
 from pathlib import Path
@@ -50,7 +50,7 @@ def cmd_line_parse(iargs=None):
     return inps
 
 ###################################################
-def add_log_remote_hdfeos5(scp_list, work_dir):
+def add_log_remote_hdfeos5(scp_list, work_dir, ssh_options=()):
     # add uploaded he5 files to remote log file
 
     REMOTEHOST_DATA = os.getenv('REMOTEHOST_DATA')
@@ -85,14 +85,13 @@ def add_log_remote_hdfeos5(scp_list, work_dir):
         raise Exception('ERROR: data_footprint not found in metadata')
     data_footprint = metadata['data_footprint']
 
-    for relative_file in relative_he5_files:
-        escaped_data_footprint = shlex.quote(data_footprint)
-
-        command = f"""ssh {REMOTEUSER}@{REMOTEHOST_DATA} "echo {current_date} {relative_file} {escaped_data_footprint} >> {REMOTELOGFILE}" """
-
-        status = subprocess.Popen(command, shell=True).wait()
-        if status != 0:
-            raise Exception('ERROR appending to remote log file in upload_horzvert.py')
+    # append all lines with one ssh session; lines go via stdin so the footprint needs no shell quoting
+    log_lines = ''.join(f"{current_date} {relative_file} {data_footprint}\n" for relative_file in relative_he5_files)
+    command = ['ssh', *ssh_options, f'{REMOTEUSER}@{REMOTEHOST_DATA}', f'cat >> {REMOTELOGFILE}']
+    print(' '.join(command))
+    status = subprocess.run(command, input=log_lines, text=True).returncode
+    if status != 0:
+        raise Exception('ERROR appending to remote log file in upload_horzvert.py')
 
 ##############################################################################
 
@@ -175,77 +174,68 @@ def main(iargs=None):
 
     remote_url = 'http://' + REMOTEHOST_DATA + REMOTE_DIR + data_dir
 
+    # All following ssh/rsync calls share one multiplexed connection
+    ssh_options = putils.start_ssh_master(REMOTE_CONNECTION)
+    atexit.register(putils.stop_ssh_master, REMOTE_CONNECTION, ssh_options)
+
     print('\n################')
     print('Deleting remote directory...')
     remote_path = f'{REMOTE_DIR}{data_dir}'
-    cleanup_cmd = f'ssh {REMOTE_CONNECTION} "rm -rf {remote_path}"'
-    print(f'Deleting: {cleanup_cmd}')
-    status = subprocess.Popen(cleanup_cmd, shell=True).wait()
+    cleanup_cmd = ['ssh', *ssh_options, REMOTE_CONNECTION, 'rm', '-rf', remote_path]
+    print(f'Deleting: {" ".join(cleanup_cmd)}')
+    status = subprocess.run(cleanup_cmd).returncode
     if status != 0:
         print(f'Warning: Could not delete {remote_path} (may not exist yet)')
 
     print('################\n')
+    # Collect existing paths and their remote parent directories, then upload everything
+    # in ONE ssh/rsync session instead of one mkdir + one rsync per file or directory
+    upload_paths = []
+    parent_dirs = set()
     for pattern in scp_list:
         # Remove leading slash if present
         clean_pattern = pattern.lstrip('/')
-        
+
         # Check if path exists
         full_path = os.path.join(inps.work_dir, clean_pattern)
         if not os.path.exists(full_path):
             print(f'Warning: Path does not exist, skipping: {full_path}')
             continue
 
-        # Determine if it's a file or directory
-        if os.path.isfile(full_path):
-            # It's a file
-            parent_dir = os.path.dirname(clean_pattern)
-            
-            # Create remote parent directory
-            print(f'\nCreating remote directory: {parent_dir}')
-            command = f'ssh {REMOTE_CONNECTION} "mkdir -p {REMOTE_DIR}{parent_dir}"'
-            print(command)
-            status = subprocess.Popen(command, shell=True).wait()
-            if status != 0:
-                raise Exception('ERROR creating remote directory in upload_horzvert.py')
-
-            # Upload file
-            print(f'\nUploading file: {clean_pattern}')
-            command = f'rsync -avz --progress {full_path} {REMOTE_CONNECTION_DIR}{parent_dir}/'
-            print(command)
-            status = subprocess.Popen(command, shell=True).wait()
-            if status != 0:
-                raise Exception('ERROR uploading file using rsync in upload_horzvert.py')
-                
-        elif os.path.isdir(full_path):
-            # It's a directory - upload recursively
-            parent_dir = os.path.dirname(clean_pattern)
-            
-            # Create remote parent directory
-            print(f'\nCreating remote parent directory: {parent_dir}')
-            command = f'ssh {REMOTE_CONNECTION} "mkdir -p {REMOTE_DIR}{parent_dir}"'
-            print(command)
-            status = subprocess.Popen(command, shell=True).wait()
-            if status != 0:
-                raise Exception('ERROR creating remote directory in upload_horzvert.py')
-
-            # Upload directory recursively
-            print(f'\nUploading directory: {clean_pattern}')
-            command = f'rsync -avz --progress {full_path} {REMOTE_CONNECTION_DIR}{parent_dir}/'
-            print(command)
-            status = subprocess.Popen(command, shell=True).wait()
-            if status != 0:
-                raise Exception('ERROR uploading directory using rsync in upload_horzvert.py')
+        # Files and directories (uploaded recursively) both go below their parent directory
+        upload_paths.append(clean_pattern)
+        parent_dirs.add(os.path.dirname(clean_pattern))
+
+    if upload_paths:
+        # Create remote parent directories
+        print(f'\nCreating remote directories: {" ".join(sorted(parent_dirs))}')
+        command = ['ssh', *ssh_options, REMOTE_CONNECTION, 'mkdir', '-p'] + [f'{REMOTE_DIR}{d}' for d in sorted(parent_dirs)]
+        print(' '.join(command))
+        status = subprocess.run(command).returncode
+        if status != 0:
+            raise Exception('ERROR creating remote directory in upload_horzvert.py')
+
+        # Upload files and directories (--files-from implies --relative; -r recurses into listed dirs)
+        print(f'\nUploading {len(upload_paths)} files/directories')
+        command = ['rsync', '-avz', '-r', '--progress']
+        if ssh_options:
+            command += ['-e', ' '.join(['ssh', *ssh_options])]
+        command += ['--files-from=-', f'{inps.work_dir}/', REMOTE_CONNECTION_DIR]
+        print(' '.join(command))
+        status = subprocess.run(command, input='\n'.join(upload_paths) + '\n', text=True).returncode
+        if status != 0:
+            raise Exception('ERROR uploading using rsync in upload_horzvert.py')
 
     # adjust permissions
     print('\nAdjusting permissions:')
-    command = 'ssh ' + REMOTEUSER + '@' + REMOTEHOST_DATA + ' chmod -R u=rwX,go=rX ' + REMOTE_DIR + project_name
-    print(command)
-    status = subprocess.Popen(command, shell=True).wait()
-    if status is not 0:
+    command = ['ssh', *ssh_options, REMOTE_CONNECTION, 'chmod', '-R', 'u=rwX,go=rX', REMOTE_DIR + project_name]
+    print(' '.join(command))
+    status = subprocess.run(command).returncode
+    if status != 0:
         raise Exception('ERROR adjusting permissions in upload_horzvert.py')
 
 ##########################################
-    add_log_remote_hdfeos5(scp_list, inps.work_dir)
+    add_log_remote_hdfeos5(scp_list, inps.work_dir, ssh_options)
 ##########################################
     print('Data at:')
     print(remote_url)
@@ -17,6 +17,7 @@ import numpy as np
 import h5py
 import math
 import re
+import subprocess
 from pathlib import Path
 from natsort import natsorted
 import xml.etree.ElementTree as ET
@@ -26,6 +27,7 @@ from minsar.objects.dataset_template import Template
 from minsar.objects.auto_defaults import PathFind, queue_config_file
 from mintpy.utils import readfile
 import time, datetime
+from collections import namedtuple
 
 pathObj = PathFind()
 
@@ -641,6 +643,26 @@ def extract_queuename_from_job_file(file):
                 return queue_name
 ##########################################################################
 
+JobMetadata = namedtuple('JobMetadata', ['walltime', 'queue'])
+
+def extract_job_metadata(file):
+    """ Extracts walltime and queue name from a job file in a single pass (None if not found) """
+    walltime = queue_name = None
+    with open(file) as fr:
+        for line in fr:
+            if walltime is None:
+                if '#BSUB -W' in line:
+                    walltime = line.split('-W')[1].strip()
+                elif '#SBATCH -t' in line:
+                    walltime = line.split('-t')[1].strip()
+            if queue_name is None and '#SBATCH -p' in line:
+                queue_name = line.split('-p')[1].strip()
+            if walltime is not None and queue_name is not None:
+                break
+    return JobMetadata(walltime, queue_name)
+
+##########################################################################
+
 def extract_step_name_from_stdout_name(job_name):
     """ Extracts the step name from a stdout name """
     job_name = os.path.basename(job_name).split('.o')[0]
@@ -1304,6 +1326,12 @@ def walltime_to_seconds(wall_time_str):
     return days * 86400 + hours * 3600 + minutes * 60 + seconds
 
 
+def seconds_to_walltime(total_seconds):
+    """Convert total seconds to a HH:MM:SS walltime string (hours may exceed 24)."""
+    total_seconds = int(total_seconds)
+    return '{:02d}:{:02d}:{:02d}'.format(total_seconds // 3600, (total_seconds % 3600) // 60, total_seconds % 60)
+
+
 def get_queue_rerun_params(platform_name, queue_name):
     """
     Read queues.cfg and return MAX_WALLTIME and QUEUE_AT_MAX_WALLTIME for the given platform+queue.
@@ -1372,11 +1400,12 @@ def extract_step_name_from_job_file(job_file_path):
     return basename
 
 
-def compute_rerun_walltime_and_queue(job_file_path):
+def compute_rerun_walltime_and_queue(job_file_path, job_metadata=None):
     """
     Compute new walltime and optionally new queue for a timeout rerun using job_defaults.cfg and queues.cfg.
     Returns (new_walltime_str, new_queue_or_None). Caller should replace_walltime_in_job_file and, if
-    new_queue_or_None is not None, replace_queuename_in_job_file.
+    new_queue_or_None is not None, replace_queuename_in_job_file. Pass job_metadata (from
+    extract_job_metadata) if already read, so the job file is not read again.
     """
     config = get_config_defaults(config_file='job_defaults.cfg')
     step_name = extract_step_name_from_job_file(job_file_path)
@@ -1400,8 +1429,9 @@ def compute_rerun_walltime_and_queue(job_file_path):
         except ValueError:
             factor_switch = rerun_factor
 
-    current_walltime = extract_walltime_from_job_file(job_file_path)
-    current_queue = extract_queuename_from_job_file(job_file_path)
+    if job_metadata is None:
+        job_metadata = extract_job_metadata(job_file_path)
+    current_walltime, current_queue = job_metadata
     platform_name = os.environ.get('PLATFORM_NAME', 'stampede3')
     queue_params = get_queue_rerun_params(platform_name, current_queue)
     max_wt_seconds = walltime_to_seconds(queue_params['MAX_WALLTIME'])
@@ -1414,11 +1444,8 @@ def compute_rerun_walltime_and_queue(job_file_path):
             new_walltime = multiply_walltime(current_walltime, factor=factor_switch)
             new_queue = queue_params['QUEUE_AT_MAX_WALLTIME']
         else:
-            # Cap at MAX_WALLTIME (convert back to HH:MM:SS)
-            h = max_wt_seconds // 3600
-            m = (max_wt_seconds % 3600) // 60
-            s = max_wt_seconds % 60
-            new_walltime = '{:02d}:{:02d}:{:02d}'.format(h, m, s)
+            # Cap at MAX_WALLTIME
+            new_walltime = seconds_to_walltime(max_wt_seconds)
     return (new_walltime, new_queue)
 
 
@@ -1701,4 +1728,23 @@ def polygon_corners_string(polygon_str: str) -> str:
 
     return  corners_str
 
-
+###############################################
+def start_ssh_master(remote_connection, persist='10m'):
+    """
+    Start a background OpenSSH master connection to remote_connection (user@host).
+    Returns the ssh options (['-o', 'ControlPath=...']) that make later ssh/rsync calls reuse it,
+    or [] if the master could not be started (callers then just open separate connections).
+    """
+    control_path = os.path.join(os.path.expanduser('~'), '.ssh', f'cm-{os.getpid()}')
+    command = ['ssh', '-M', '-N', '-f', '-o', f'ControlPath={control_path}', '-o', f'ControlPersist={persist}',
+               remote_connection]
+    if subprocess.run(command).returncode != 0:
+        print(f'Warning: could not start ssh master connection to {remote_connection}, using separate connections')
+        return []
+    return ['-o', f'ControlPath={control_path}']
+
+def stop_ssh_master(remote_connection, ssh_options):
+    """Close a master connection started with start_ssh_master (no-op if ssh_options is empty)."""
+    if ssh_options:
+        subprocess.run(['ssh', *ssh_options, '-O', 'exit', remote_connection],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
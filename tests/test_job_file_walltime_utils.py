@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the job-file and walltime helpers in process_utilities.py used by the timeout-rerun logic
+(job_submission.py, update_walltime_queuename.py). Run with:
+  python -m unittest discover -s tests -p 'test_job_file_walltime_utils.py' -v
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not os.environ.get('MINSAR_HOME'):
+    os.environ['MINSAR_HOME'] = _REPO_ROOT
+
+import minsar.utils.process_utilities as putils
+
+
+class TestExtractJobMetadata(unittest.TestCase):
+    """extract_job_metadata reads walltime and queue in one pass, like the two single-field extractors."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_job_file(self, lines):
+        path = os.path.join(self.tmpdir, 'run_01_unpack_topo_reference_0.job')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_sbatch_walltime_and_queue(self):
+        path = self._write_job_file([
+            '#! /bin/bash',
+            '#SBATCH -J run_01_unpack_topo_reference_0',
+            '#SBATCH -p skx',
+            '#SBATCH -t 02:30:00',
+            'module load launcher',
+        ])
+        meta = putils.extract_job_metadata(path)
+        self.assertEqual(meta, putils.JobMetadata('02:30:00', 'skx'))
+        self.assertEqual(meta.walltime, putils.extract_walltime_from_job_file(path))
+        self.assertEqual(meta.queue, putils.extract_queuename_from_job_file(path))
+
+    def test_bsub_walltime_without_queue(self):
+        path = self._write_job_file([
+            '#! /bin/bash',
+            '#BSUB -J run_01_unpack_topo_reference_0',
+            '#BSUB -W 2:00',
+            '#BSUB -R rusage[mem=4000]',
+        ])
+        self.assertEqual(putils.extract_job_metadata(path), putils.JobMetadata('2:00', None))
+
+    def test_first_occurrence_wins(self):
+        path = self._write_job_file([
+            '#SBATCH -t 01:00:00',
+            '#SBATCH -p normal',
+            '#SBATCH -t 05:00:00',
+            '#SBATCH -p development',
+        ])
+        self.assertEqual(putils.extract_job_metadata(path), putils.JobMetadata('01:00:00', 'normal'))
+
+    def test_missing_fields_are_none(self):
+        path = self._write_job_file([
+            '#! /bin/bash',
+            '#SBATCH -J run_01_unpack_topo_reference_0',
+            'echo done',
+        ])
+        walltime, queue = putils.extract_job_metadata(path)
+        self.assertIsNone(walltime)
+        self.assertIsNone(queue)
+
+
+class TestSecondsToWalltime(unittest.TestCase):
+    """seconds_to_walltime is the inverse of walltime_to_seconds for HH:MM:SS (used for the MAX_WALLTIME cap)."""
+
+    def test_formats_hh_mm_ss(self):
+        self.assertEqual(putils.seconds_to_walltime(0), '00:00:00')
+        self.assertEqual(putils.seconds_to_walltime(7200), '02:00:00')
+        self.assertEqual(putils.seconds_to_walltime(3723), '01:02:03')
+
+    def test_hours_at_or_above_24_are_not_wrapped(self):
+        self.assertEqual(putils.seconds_to_walltime(24 * 3600), '24:00:00')
+        self.assertEqual(putils.seconds_to_walltime(48 * 3600 + 59), '48:00:59')
+        self.assertEqual(putils.seconds_to_walltime(120 * 3600), '120:00:00')
+
+    def test_float_input_is_truncated_to_whole_seconds(self):
+        self.assertEqual(putils.seconds_to_walltime(7200.9), '02:00:00')
+        self.assertEqual(putils.seconds_to_walltime(59.5), '00:00:59')
+
+    def test_round_trip_with_walltime_to_seconds(self):
+        for seconds in (0, 59, 60, 3599, 3600, 7199, 86399, 86400, 93784, 172800):
+            with self.subTest(seconds=seconds):
+                self.assertEqual(putils.walltime_to_seconds(putils.seconds_to_walltime(seconds)), seconds)
+        for walltime in ('00:30:00', '02:00:00', '23:59:59', '24:00:00', '48:00:00'):
+            with self.subTest(walltime=walltime):
+                self.assertEqual(putils.seconds_to_walltime(putils.walltime_to_seconds(walltime)), walltime)
+
+
+if __name__ == '__main__':
+    unittest.main()